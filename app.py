@@ -21,7 +21,7 @@ def login():
     
     # Check if miner_ip is already in the dictionary
     if miner_ip in miner_ips and miner_ips[miner_ip]['ttl'] > datetime.utcnow():
-        return jsonify({'message': 'Miner already logged in.', 'token': miner_ips[miner_ip]['token']})
+        return jsonify({'message': 'Miner already logged in.', 'token': miner_ips[miner_ip]['token'], 'ttl': miner_ips[miner_ip]['ttl']})
 
     token = miner_ip + '_token'
     
@@ -34,70 +34,115 @@ def login():
     return jsonify({'message': 'Miner logged in.', 'token': token, 'ttl': expiration_time})
 
 
-@app.route('/api/logout', methods=['POST'])
-def logout():
-        
-    data = request.json
-    miner_ip = data['miner_ip']
+def is_authorized(token):
+    return any(entry['token'] == token and entry['ttl'] > datetime.utcnow() for entry in miner_ips.values())
+
+
+def apply_logout(miner_ip):
     
     # Check if miner_ip is already in the dictionary
     if miner_ip in miner_ips:
         del miner_ips[miner_ip]
-        return jsonify({'message': 'Miner logged out.'})
+        return {'message': 'Miner logged out.'}, 200
     
-    return jsonify({'message': 'Miner not logged in.'})
+    return {'message': 'Miner not logged in.'}, 200
 
 
-@app.route('/api/curtail', methods=['POST'])
-def curtail():
-    
-    data = request.json
-    mode = data.get('mode')
-    token = data.get('token')
+def apply_curtail(token, mode):
     
     # Check if miner_ip is already in the dictionary
-    if not any(entry['token'] == token and entry['ttl'] > datetime.utcnow() for entry in miner_ips.values()):
-        return jsonify({'message': 'Unauthorized. Please login with a valid token.'}), 401
+    if not is_authorized(token):
+        return {'message': 'Unauthorized. Please login with a valid token.'}, 401
 
     # Check if mode is valid
     if mode not in ['active', 'sleep']:
-        return jsonify({'message': 'Invalid curtail mode. Use active or sleep.'}), 400
+        return {'message': 'Invalid curtail mode. Use active or sleep.'}, 400
     
     # Check if the miner is already in the requested state
     current_state = miner_states.get(token)
     if current_state == mode:
-        return jsonify({'message': f'Miner is already in {mode} mode.'}), 400
+        return {'message': f'Miner is already in {mode} mode.'}, 400
 
     # update miner curtail state
     miner_states[token] = mode
     
-    return jsonify({'message': f'Miner curtail state updated to {mode}.'})
+    return {'message': f'Miner curtail state updated to {mode}.'}, 200
 
 
-@app.route('/api/profileset', methods=['POST'])
-def profileset():
-    
-    data = request.json
-    profile = data.get('profile')
-    token = data.get('token')
+def apply_profile(token, profile):
     
     # check if miner_ip is already in the dictionary
-    if not any(entry['token'] == token and entry['ttl'] > datetime.utcnow() for entry in miner_ips.values()):
-        return jsonify({'message': 'Unauthorized. Please login with a valid token.'}), 401
+    if not is_authorized(token):
+        return {'message': 'Unauthorized. Please login with a valid token.'}, 401
     
     # Check if profile is valid
     if profile not in ['underclock', 'overclock', 'normal']:
-        return jsonify({'message': 'Invalid profile. Use underclock, overclock or normal.'}), 400
+        return {'message': 'Invalid profile. Use underclock, overclock or normal.'}, 400
     
     # check if miner is already in the requested profile
     current_profile = miner_profiles.get(token)
     if current_profile == profile:
-        return jsonify({'message': f'Miner is already in {profile} profile.'}), 400
+        return {'message': f'Miner is already in {profile} profile.'}, 400
     
     # update miner profile
     miner_profiles[token] = profile
     
-    return jsonify({'message': f'Miner profile updated to {profile}.'})
+    return {'message': f'Miner profile updated to {profile}.'}, 200
+
+
+def bulk_results(entries, apply):
+    results = []
+    for entry in entries:
+        body, status = apply(entry)
+        results.append({**body, 'status': status})
+    return jsonify({'results': results})
+
+
+@app.route('/api/logout', methods=['POST'])
+def logout():
+        
+    data = request.json
+    body, status = apply_logout(data['miner_ip'])
+    return jsonify(body), status
+
+
+@app.route('/api/curtail', methods=['POST'])
+def curtail():
+    
+    data = request.json
+    body, status = apply_curtail(data.get('token'), data.get('mode'))
+    return jsonify(body), status
+
+
+@app.route('/api/profileset', methods=['POST'])
+def profileset():
+    
+    data = request.json
+    body, status = apply_profile(data.get('token'), data.get('profile'))
+    return jsonify(body), status
+
+
+# Bulk variants take {'entries': [...]} and return one result (message + status) per entry, in order
+
+@app.route('/api/bulk/logout', methods=['POST'])
+def bulk_logout():
+    
+    entries = request.json.get('entries', [])
+    return bulk_results(entries, lambda entry: apply_logout(entry.get('miner_ip')))
+
+
+@app.route('/api/bulk/curtail', methods=['POST'])
+def bulk_curtail():
+    
+    entries = request.json.get('entries', [])
+    return bulk_results(entries, lambda entry: apply_curtail(entry.get('token'), entry.get('mode')))
+
+
+@app.route('/api/bulk/profileset', methods=['POST'])
+def bulk_profileset():
+    
+    entries = request.json.get('entries', [])
+    return bulk_results(entries, lambda entry: apply_profile(entry.get('token'), entry.get('profile')))
 
 
 if __name__ == '__main__':
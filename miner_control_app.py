@@ -1,111 +1,269 @@
+import asyncio
+import bisect
+import functools
+import ipaddress
+import itertools
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 import time
-import threading
 import logging
 from datetime import datetime, timezone, timedelta
+from email.utils import parsedate_to_datetime
 from concurrent.futures import ThreadPoolExecutor
 
+# Daily schedule (UTC): each mode in _MODES applies until the hour at the same index in _BOUNDS
+_BOUNDS = (6, 12, 18, 24)
+_MODES = (('overclock', 'active'), ('normal', 'active'), ('underclock', 'active'), ('normal', 'sleep'))
+
 class MinerControlApp:
-    def __init__(self, miner_ips, max_workers=10, max_retries=3, log_file='miner_control.log'):
+    _TIMEOUT = (1.0, 5.0)  # (connect, read) timeouts in seconds, so unreachable miners fail fast
+    _IGNORED = object()  # Returned by make_request when the error is in ignore_errors (e.g., the setting is already applied)
+
+    def __init__(self, miner_ips, max_workers=256, max_retries=3, log_file='miner_control.log', bulk_chunk_size=100,
+                 cycle_chunk_size=1000, base_url='http://127.0.0.1:5000/api'):
         """
         Initializes the MinerControlApp with the provided miner IPs, maximum number of worker threads,
-        maximum number of retries for API requests, and the log file location.
+        maximum number of retries for API requests, the log file location, the number of miners
+        sent per bulk API request, the number of miners processed together within a cycle, and the
+        base URL of the Miner Control API.
+
+        miner_ips can be any re-iterable of IP strings or an ipaddress network; it is read lazily,
+        cycle_chunk_size miners at a time, so large fleets are never materialized in full.
         """
-        self.miner_ips = miner_ips  # List of miner IP addresses
-        self.base_url = 'http://127.0.0.1:5000/api'  # Base URL for API requests
-        self.lock = threading.Lock()  # Lock for thread-safe operations
-        self.miner_tokens = {}  # Cache for miner tokens and their TTLs (Time-To-Live)
-        self.max_workers = max_workers  # Maximum number of worker threads
-        self.max_retries = max_retries  # Maximum number of retries for API requests
+        if iter(miner_ips) is miner_ips:
+            # A one-shot iterator (e.g. a generator) would be exhausted after the first cycle
+            raise TypeError("miner_ips must be re-iterable (e.g. a list, tuple or ipaddress network), not an iterator")
+        self.miner_ips = miner_ips  # Miner IP addresses (iterable of strings or an ipaddress network)
+        self.base_url = base_url  # Base URL for API requests
+        # Endpoint URLs, built once instead of on every request
+        self._urls = {path: f'{self.base_url}/{path}' for path in (
+            'login', 'logout', 'profileset', 'curtail', 'bulk/logout', 'bulk/profileset', 'bulk/curtail')}
+        self.miner_tokens = {}  # Cache for miner tokens and their expiry times (TTL), reused across cycles
+        self.max_workers = max_workers  # Maximum number of concurrent in-flight miners
+        self.max_retries = max_retries  # Maximum number of attempts per API request
+        self.bulk_chunk_size = bulk_chunk_size  # Maximum number of miners per bulk API request
+        self.cycle_chunk_size = cycle_chunk_size  # Maximum number of miners held in memory per cycle step
+        self.bulk_supported = None  # Whether the API has bulk endpoints; None until the first bulk request
+
+        # Worker threads for the blocking API calls, kept for the app's lifetime instead of recreated every cycle.
+        # Each call parks a thread while waiting on I/O, so the pool is sized for in-flight requests, not CPUs.
+        # close() shuts it down and a later start() creates a new one.
+        self._executor = self._new_executor()
+
+        # Shared HTTP session so every request reuses pooled keep-alive connections.
+        # All requests go to the API host, so one per-host pool with a connection per worker is enough;
+        # a smaller pool would discard connections whenever more than pool_maxsize requests are in flight.
+        self.session = requests.Session()
+        self.session.headers['Content-Type'] = 'application/json'  # Bodies are pre-encoded with orjson
+        # Transient failures (connection errors, 502/503/504) are retried inside urllib3 with exponential
+        # backoff capped at 4 seconds; max_retries counts attempts, so the first request plus max_retries - 1 retries.
+        retry = Retry(
+            total=max(self.max_retries - 1, 0),
+            backoff_factor=1,
+            backoff_max=4,  # Keep dead-miner waits short even if max_retries is raised
+            status_forcelist=(502, 503, 504),
+            allowed_methods={'POST'},
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
 
         # Setup logging configuration
         logging.basicConfig(
             filename=log_file,
-            level=logging.DEBUG,
+            level=logging.INFO,
             format='%(asctime)s [%(levelname)s] %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
         self.logger = logging.getLogger()
 
-    def make_request(self, url, data, retries, re_login_on_unauthorized=False, ignore_errors=None):
+    @classmethod
+    def from_cidr(cls, cidr, **kwargs):
+        """
+        Creates an app that controls every host address in a network.
+
+        Args:
+            cidr (str): The miner network, e.g. '192.168.0.0/22'.
+            **kwargs: Passed through to the constructor.
+
+        Returns:
+            MinerControlApp: An app whose miner IPs are generated from the network each cycle.
+        """
+        return cls(ipaddress.ip_network(cidr), **kwargs)
+
+    def iter_miner_ips(self):
+        """
+        Returns a fresh iterator over the miner IP addresses for one cycle.
+        """
+        if isinstance(self.miner_ips, (ipaddress.IPv4Network, ipaddress.IPv6Network)):
+            return (str(ip) for ip in self.miner_ips.hosts())
+        return iter(self.miner_ips)
+
+    def make_request(self, url, data, re_login_on_unauthorized=False, ignore_errors=None, probe_unsupported=False):
         """
-        Centralized method to make a POST request to the API with retry logic and specific error handling.
+        Centralized method to make a POST request to the API with specific error handling.
+        Connection errors and 502/503/504 responses are retried with backoff by the session's
+        urllib3 Retry policy, so a failure reaching this method is final.
 
         Args:
             url (str): The API endpoint URL.
             data (dict): The JSON data to send in the POST request.
-            retries (int): Number of times to retry the request on failure.
             re_login_on_unauthorized (bool): Whether to attempt re-login if unauthorized.
             ignore_errors (list): List of error messages to ignore during the request.
+            probe_unsupported (bool): Whether a 404/405 means the endpoint is not available, rather than a failure.
 
         Returns:
-            response: The response object if the request is successful, or None if all retries fail.
+            response: The response object if the request is successful, _IGNORED if the error was ignored,
+            'unauthorized' or 'unsupported' for the cases enabled above, or None if the request fails.
         """
         if ignore_errors is None:
             ignore_errors = []
 
-        for attempt in range(retries):
-            try:
-                response = requests.post(url, json=data, timeout=5)  # Increased timeout
-                self.logger.debug(f"Response status code: {response.status_code}")
+        try:
+            response = self.session.post(url, data=orjson.dumps(data), timeout=self._TIMEOUT)
+        except requests.RequestException as e:
+            self.logger.error("Error making request to %s after %s attempts: %s", url, self.max_retries, e)
+            return None
 
-                # Handle successful response
-                if response.status_code == 200:
-                    return response
-                
-                # Handle specific errors that should be ignored such as the profile/ curtail is being set already
-                response_json = response.json()
-                error_message = response_json.get('message', '')
-                if any(error in error_message for error in ignore_errors):
-                    self.logger.info(f"Ignoring error: {error_message}. No retry will be performed.")
-                    response.status_code = 100  # Custom status code to indicate ignored error
-                    response._content = b"Ignoring error due to it is being set already"  # Modify the content
-                    return response  # Exit early to avoid retrying
-
-                # Handle unauthorized error with optional re-login
-                if response.status_code == 401 and re_login_on_unauthorized:
-                    self.logger.warning(f"Unauthorized request to {url}, attempting re-login.")
-                    return 'unauthorized'
-
-                # Handle other non-200 responses
-                self.logger.warning(f"Failed request to {url}. Response: {response.text}")
-                print(f"Failed request to {url}. Response: {response.text}")
-
-            except requests.RequestException as e:
-                self.logger.error(f"Error making request to {url}: {str(e)}. Attempt {attempt + 1} of {retries}. Retrying...")
-                print(f"Error making request to {url}: {str(e)}. Attempt {attempt + 1} of {retries}. Retrying...")
-
-            time.sleep(2 ** attempt)  # Exponential backoff
-            
-        self.logger.error(f"Failed to complete request to {url} after {retries} attempts.")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Response status code: %s", response.status_code)
+
+        # Handle successful response
+        if response.status_code == 200:
+            return response
+
+        # Handle endpoints the server does not provide
+        if response.status_code in (404, 405) and probe_unsupported:
+            return 'unsupported'
+
+        # Handle specific errors that should be ignored such as the profile/ curtail is being set already
+        try:
+            response_json = orjson.loads(response.content)
+        except orjson.JSONDecodeError:
+            response_json = None
+        error_message = response_json.get('message', '') if isinstance(response_json, dict) else ''
+        if not isinstance(error_message, str):
+            error_message = ''
+        if any(error in error_message for error in ignore_errors):
+            self.logger.info("Ignoring error: %s. No retry will be performed.", error_message)
+            response.close()  # Release the connection back to the pool
+            return self._IGNORED
+
+        # Handle unauthorized error with optional re-login
+        if response.status_code == 401 and re_login_on_unauthorized:
+            self.logger.warning("Unauthorized request to %s, attempting re-login.", url)
+            return 'unauthorized'
+
+        # Handle other non-200 responses
+        self.logger.warning("Failed request to %s. Response: %s", url, response.text)
         return None
 
     def login(self, miner_ip):
-        url = f'{self.base_url}/login'
+        url = self._urls['login']
         data = {'miner_ip': miner_ip}
-        response = self.make_request(url, data, self.max_retries)
+        response = self.make_request(url, data)
         
         if response:
-            token_data = response.json()
+            token_data = orjson.loads(response.content)
             token = token_data.get('token')
-            ttl = token_data.get('ttl')
+            ttl = self.parse_ttl(token_data.get('ttl'))
 
             if token:
-                with self.lock:
-                    # Store even if ttl is missing
-                    self.miner_tokens[miner_ip] = {'token': token, 'ttl': ttl}
-                self.logger.info(f'Successfully logged in miner {miner_ip}')
-                print(f'Successfully logged in miner {miner_ip}')
+                # Store even if ttl is missing; such tokens are never reused from the cache.
+                # Single dict assignments are atomic under the GIL, so no lock is needed.
+                self.miner_tokens[miner_ip] = {'token': token, 'ttl': ttl}
+                self.logger.info('Successfully logged in miner %s', miner_ip)
                 return token
             else:
-                self.logger.error(f"Login response for miner {miner_ip} did not contain a token.")
-                print(f"Login response for miner {miner_ip} did not contain a token.")
+                self.logger.error("Login response for miner %s did not contain a token.", miner_ip)
                 return None
         else:
-            self.logger.error(f'Failed to log in miner {miner_ip} after {self.max_retries} attempts.')
-            print(f'Failed to log in miner {miner_ip} after {self.max_retries} attempts.')
+            self.logger.error('Failed to log in miner %s.', miner_ip)
             return None
     
+    @staticmethod
+    def parse_ttl(ttl):
+        """
+        Parses the TTL returned by the login API into an aware UTC datetime.
+
+        Args:
+            ttl (str): The token expiry, either ISO 8601 or an HTTP date (as produced by Flask's jsonify).
+
+        Returns:
+            datetime: The expiry time in UTC, or None if the TTL is missing or cannot be parsed.
+        """
+        if not ttl:
+            return None
+        try:
+            expires_at = datetime.fromisoformat(ttl)
+        except (TypeError, ValueError):
+            try:
+                expires_at = parsedate_to_datetime(ttl)
+            except (TypeError, ValueError):
+                return None
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        return expires_at
+
+    def get_token(self, miner_ip):
+        """
+        Returns a cached token for the miner if it has not expired yet, otherwise logs in again.
+
+        Args:
+            miner_ip (str): The IP address of the miner.
+
+        Returns:
+            str: The authentication token, or None if login fails.
+        """
+        token_info = self.miner_tokens.get(miner_ip)
+        if token_info and token_info['ttl'] and token_info['ttl'] > datetime.now(timezone.utc):
+            return token_info['token']
+        return self.login(miner_ip)
+
+    def evict_expired_tokens(self):
+        """
+        Removes cached tokens that have expired so the cache stays bounded. Tokens without a TTL
+        are left for logout_uncacheable(), since their sessions are still open on the server.
+        """
+        now = datetime.now(timezone.utc)
+        expired = [miner_ip for miner_ip, token_info in list(self.miner_tokens.items())
+                   if token_info['ttl'] and token_info['ttl'] <= now]
+        for miner_ip in expired:
+            self.miner_tokens.pop(miner_ip, None)
+        if expired:
+            self.logger.debug("Evicted %s expired tokens from the cache.", len(expired))
+
+    def logout_uncacheable(self):
+        """
+        Logs out miners whose token has no TTL. Such tokens are never reused, so their sessions
+        are closed at the end of every cycle, as before token caching.
+        """
+        self.logout_miners([miner_ip for miner_ip, token_info in list(self.miner_tokens.items()) if not token_info['ttl']])
+
+    def logout_all(self):
+        """
+        Logs out every miner that still holds a cached token.
+        """
+        self.logout_miners(list(self.miner_tokens))
+
+    def logout_miners(self, miner_ips):
+        """
+        Logs out the given miners, in bulk where the API allows it.
+
+        Args:
+            miner_ips (list): The IP addresses of the miners.
+        """
+        if not miner_ips:
+            return
+        failed = self.bulk_logout(miner_ips)
+        if failed is None:
+            failed = miner_ips
+        if failed:
+            list(self._executor.map(self.logout, failed))
+
     def logout(self, miner_ip):
         """
         Logs out from a miner and removes its token from the cache.
@@ -113,18 +271,14 @@ class MinerControlApp:
         Args:
             miner_ip (str): The IP address of the miner.
         """
-        url = f'{self.base_url}/logout'
+        url = self._urls['logout']
         data = {'miner_ip': miner_ip}
-        response = self.make_request(url, data, self.max_retries)
+        response = self.make_request(url, data)
         if response:
-            with self.lock:
-                if miner_ip in self.miner_tokens:
-                    del self.miner_tokens[miner_ip]
-            self.logger.info(f'Successfully logged out miner {miner_ip}.')
-            print(f'Successfully logged out miner {miner_ip}.')
+            self.miner_tokens.pop(miner_ip, None)
+            self.logger.info('Successfully logged out miner %s.', miner_ip)
         else:
-            self.logger.error(f'Failed to log out miner {miner_ip} after {self.max_retries} attempts.')
-            print(f'Failed to log out miner {miner_ip} after {self.max_retries} attempts.')
+            self.logger.error('Failed to log out miner %s.', miner_ip)
 
     def set_profile(self, miner_ip, token, profile):
         """
@@ -134,22 +288,29 @@ class MinerControlApp:
             miner_ip (str): The IP address of the miner.
             token (str): The authentication token for the miner.
             profile (str): The desired profile to set.
+
+        Returns:
+            str: The token in use after the call (refreshed if the given one was rejected), or None if re-login failed.
         """
-        url = f'{self.base_url}/profileset'
-        data = {'token': token, 'profile': profile}
-        response = self.make_request(url, data, self.max_retries, re_login_on_unauthorized=True, ignore_errors=["Miner is already in"])
-        if response == 'unauthorized':
-            self.logger.warning(f"Unauthorized token for miner {miner_ip}, attempting re-login...")
-            print(f"Unauthorized token for miner {miner_ip}, attempting re-login...")
-            token = self.login(miner_ip)
-            if token:
-                self.set_profile(miner_ip, token, profile)
-        elif response:
-            self.logger.info(f'Successfully set profile for miner {miner_ip} to {profile}.')
-            print(f'Successfully set profile for miner {miner_ip} to {profile}.')
-        else:
-            self.logger.error(f'Failed to set profile for miner {miner_ip} after {self.max_retries} attempts.')
-            print(f'Failed to set profile for miner {miner_ip} after {self.max_retries} attempts.')
+        url = self._urls['profileset']
+        # Try once, and once more with a fresh token if the cached one was rejected
+        re_login_on_unauthorized = True
+        for _ in range(2):
+            data = {'token': token, 'profile': profile}
+            response = self.make_request(url, data, re_login_on_unauthorized=re_login_on_unauthorized, ignore_errors=["Miner is already in"])
+            if response == 'unauthorized':
+                self.logger.warning("Unauthorized token for miner %s, attempting re-login...", miner_ip)
+                token = self.login(miner_ip)
+                if not token:
+                    break
+                re_login_on_unauthorized = False
+                continue
+            if response is self._IGNORED or response:
+                self.logger.info('Successfully set profile for miner %s to %s.', miner_ip, profile)
+                return token
+            break
+        self.logger.error('Failed to set profile for miner %s.', miner_ip)
+        return token
 
     def set_curtail(self, miner_ip, token, mode):
         """
@@ -159,22 +320,139 @@ class MinerControlApp:
             miner_ip (str): The IP address of the miner.
             token (str): The authentication token for the miner.
             mode (str): The desired curtailment mode to set.
+
+        Returns:
+            str: The token in use after the call (refreshed if the given one was rejected), or None if re-login failed.
         """
-        url = f'{self.base_url}/curtail'
-        data = {'token': token, 'mode': mode}
-        response = self.make_request(url, data, self.max_retries, re_login_on_unauthorized=True, ignore_errors=["Miner is already in"])
-        if response == 'unauthorized':
-            self.logger.warning(f"Unauthorized token for miner {miner_ip}, attempting re-login...")
-            print(f"Unauthorized token for miner {miner_ip}, attempting re-login...")
-            token = self.login(miner_ip)
-            if token:
-                self.set_curtail(miner_ip, token, mode)
-        elif response:
-            self.logger.info(f'Curtail mode for miner {miner_ip} set to {mode}.')
-            print(f'Curtail mode for miner {miner_ip} set to {mode}.')
-        else:
-            self.logger.error(f'Failed to curtail miner {miner_ip} after {self.max_retries} attempts.')
-            print(f'Failed to curtail miner {miner_ip} after {self.max_retries} attempts.')
+        url = self._urls['curtail']
+        # Try once, and once more with a fresh token if the cached one was rejected
+        re_login_on_unauthorized = True
+        for _ in range(2):
+            data = {'token': token, 'mode': mode}
+            response = self.make_request(url, data, re_login_on_unauthorized=re_login_on_unauthorized, ignore_errors=["Miner is already in"])
+            if response == 'unauthorized':
+                self.logger.warning("Unauthorized token for miner %s, attempting re-login...", miner_ip)
+                token = self.login(miner_ip)
+                if not token:
+                    break
+                re_login_on_unauthorized = False
+                continue
+            if response is self._IGNORED or response:
+                self.logger.info('Curtail mode for miner %s set to %s.', miner_ip, mode)
+                return token
+            break
+        self.logger.error('Failed to curtail miner %s.', miner_ip)
+        return token
+
+    def bulk_request(self, path, entries):
+        """
+        Sends entries to a bulk API endpoint, bulk_chunk_size entries per request.
+
+        Args:
+            path (str): The bulk endpoint below {base_url}/bulk (e.g., 'curtail').
+            entries (list): The JSON entries to send, one per miner.
+
+        Returns:
+            list: One result dict (or None if its chunk failed) per entry, in order,
+            or None if the API does not provide bulk endpoints.
+        """
+        if self.bulk_supported is False:
+            return None
+
+        url = self._urls[f'bulk/{path}']
+        results = []
+        for start in range(0, len(entries), self.bulk_chunk_size):
+            chunk = entries[start:start + self.bulk_chunk_size]
+            response = self.make_request(url, {'entries': chunk}, probe_unsupported=True)
+            if response == 'unsupported':
+                self.logger.info("API does not support bulk requests, falling back to per-miner requests.")
+                self.bulk_supported = False
+                return None
+            if response:
+                self.bulk_supported = True
+                try:
+                    chunk_results = orjson.loads(response.content).get('results', [])
+                except (orjson.JSONDecodeError, AttributeError):
+                    chunk_results = None
+                if not isinstance(chunk_results, list):
+                    self.logger.warning("Malformed bulk response from %s, retrying its miners individually.", url)
+                    chunk_results = []
+                chunk_results = chunk_results[:len(chunk)]
+                results.extend(chunk_results + [None] * (len(chunk) - len(chunk_results)))
+            else:
+                results.extend([None] * len(chunk))
+        return results
+
+    def _bulk_apply(self, path, key, entries, ignore_errors=("Miner is already in",)):
+        """
+        Applies a (miner_ip, token, value) setting to many miners through a bulk endpoint.
+
+        Returns:
+            list: The entries that were not applied and should be retried per miner,
+            or None if the API does not provide bulk endpoints.
+        """
+        results = self.bulk_request(path, [{'token': token, key: value} for _, token, value in entries])
+        if results is None:
+            return None
+
+        failed = []
+        for entry, result in zip(entries, results):
+            if isinstance(result, dict):
+                message = result.get('message', '')
+                if not isinstance(message, str):
+                    message = ''
+                if result.get('status') == 200 or any(error in message for error in ignore_errors):
+                    continue
+            failed.append(entry)
+        self.logger.info("Bulk %s applied to %s of %s miners.", path, len(entries) - len(failed), len(entries))
+        return failed
+
+    def bulk_set_curtail(self, entries):
+        """
+        Sets the curtailment mode of many miners through the bulk API.
+
+        Args:
+            entries (list): (miner_ip, token, mode) tuples.
+
+        Returns:
+            list: The entries that still need a per-miner set_curtail, or None if bulk requests are unsupported.
+        """
+        return self._bulk_apply('curtail', 'mode', entries)
+
+    def bulk_set_profile(self, entries):
+        """
+        Sets the operation profile of many miners through the bulk API.
+
+        Args:
+            entries (list): (miner_ip, token, profile) tuples.
+
+        Returns:
+            list: The entries that still need a per-miner set_profile, or None if bulk requests are unsupported.
+        """
+        return self._bulk_apply('profileset', 'profile', entries)
+
+    def bulk_logout(self, miner_ips):
+        """
+        Logs out many miners through the bulk API and removes their tokens from the cache.
+
+        Args:
+            miner_ips (list): The IP addresses of the miners.
+
+        Returns:
+            list: The miners that still need a per-miner logout, or None if bulk requests are unsupported.
+        """
+        results = self.bulk_request('logout', [{'miner_ip': miner_ip} for miner_ip in miner_ips])
+        if results is None:
+            return None
+
+        failed = []
+        for miner_ip, result in zip(miner_ips, results):
+            if isinstance(result, dict) and result.get('status') == 200:
+                self.miner_tokens.pop(miner_ip, None)
+            else:
+                failed.append(miner_ip)
+        self.logger.info("Bulk logout applied to %s of %s miners.", len(miner_ips) - len(failed), len(miner_ips))
+        return failed
 
     def determine_mode(self):
         """
@@ -184,75 +462,187 @@ class MinerControlApp:
             tuple: (profile, curtail_mode, next_transition) where profile is the operation profile, 
             curtail_mode is the curtailment mode, and next_transition is the datetime for the next mode transition.
         """
-        current_hour = datetime.now(timezone.utc).hour
-        if 0 <= current_hour < 6:
-            next_transition = datetime.now(timezone.utc).replace(hour=6, minute=0, second=0, microsecond=0)
-            return 'overclock', 'active', next_transition
-        elif 6 <= current_hour < 12:
-            next_transition = datetime.now(timezone.utc).replace(hour=12, minute=0, second=0, microsecond=0)
-            return 'normal', 'active', next_transition
-        elif 12 <= current_hour < 18:
-            next_transition = datetime.now(timezone.utc).replace(hour=18, minute=0, second=0, microsecond=0)
-            return 'underclock', 'active', next_transition
-        else:
-            next_transition = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
-            return 'normal', 'sleep', next_transition
+        now = datetime.now(timezone.utc)
+        idx = bisect.bisect_right(_BOUNDS, now.hour)
+        profile, curtail_mode = _MODES[idx]
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        next_transition = midnight + timedelta(hours=_BOUNDS[idx])
+        return profile, curtail_mode, next_transition
 
-    def process_miner(self, miner_ip):
+    def process_miner(self, miner_ip, profile, curtail_mode):
         """
-        Processes a miner by logging in, setting curtail mode, setting profile, and logging out.
+        Processes a miner by obtaining a token (cached or via login), setting curtail mode and setting profile.
+        The token is kept for later cycles; miners are logged out on shutdown.
 
         Args:
             miner_ip (str): The IP address of the miner.
+            profile (str): The profile for the current cycle, as returned by determine_mode().
+            curtail_mode (str): The curtailment mode for the current cycle, as returned by determine_mode().
         """
-
-        # token_info = self.miner_tokens.get(miner_ip)
-        # if not token_info or token_info['ttl'] <= datetime.utcnow():
-        #     token = self.login(miner_ip)
-        # else:
-        #     token = token_info['token']
         try:
-            token = self.login(miner_ip)
+            token = self.get_token(miner_ip)
             if token:
                 try:
-                    profile, curtail_mode, _ = self.determine_mode()
-                    self.set_curtail(miner_ip, token, curtail_mode)
+                    # Carry a token refreshed by set_curtail over to set_profile
+                    token = self.set_curtail(miner_ip, token, curtail_mode) or token
                 except Exception as e:
-                    self.logger.error(f"Error setting curtail mode for {miner_ip}: {str(e)}")
+                    self.logger.error("Error setting curtail mode for %s: %s", miner_ip, e)
                 
                 try:
                     self.set_profile(miner_ip, token, profile)
                 except Exception as e:
-                    self.logger.error(f"Error setting profile for {miner_ip}: {str(e)}")
-                
-                try:
-                    self.logout(miner_ip)
-                except Exception as e:
-                    self.logger.error(f"Error logging out {miner_ip}: {str(e)}")
+                    self.logger.error("Error setting profile for %s: %s", miner_ip, e)
             else:
-                self.logger.error(f"No token received for {miner_ip}, skipping further steps.")
+                self.logger.error("No token received for %s, skipping further steps.", miner_ip)
         except Exception as e:
-            self.logger.error(f"Error processing miner {miner_ip}: {str(e)}")
+            self.logger.error("Error processing miner %s: %s", miner_ip, e)
+
+    async def run_cycle(self, profile, curtail_mode):
+        """
+        Processes every miner concurrently on a single event loop, cycle_chunk_size miners at a time.
+
+        The requests-based API calls are blocking, so each call is handed to a worker
+        thread of the app's executor while the event loop keeps up to max_workers calls
+        in flight at once.
+        Tokens are collected first so curtail mode and profile can be set through the
+        bulk API; miners the bulk API could not update are retried one by one.
+
+        Args:
+            profile (str): The profile to apply to every miner this cycle.
+            curtail_mode (str): The curtailment mode to apply to every miner this cycle.
+        """
+        miner_ips = self.iter_miner_ips()
+        while True:
+            chunk = list(itertools.islice(miner_ips, self.cycle_chunk_size))
+            if not chunk:
+                break
+            await self._process_chunk(chunk, profile, curtail_mode)
+
+    async def _process_chunk(self, miner_ips, profile, curtail_mode):
+        """
+        Processes one chunk of miners, through the bulk API when it is available.
+        """
+        if self.bulk_supported is not False:
+            tokens = await self._fan_out(self.get_token, [(miner_ip,) for miner_ip in miner_ips])
+            logged_in = []
+            for miner_ip, token in zip(miner_ips, tokens):
+                if token:
+                    logged_in.append((miner_ip, token))
+                else:
+                    self.logger.error("No token received for %s, skipping further steps.", miner_ip)
+
+            curtail_entries = [(miner_ip, token, curtail_mode) for miner_ip, token in logged_in]
+            curtail_failed = await self._bulk(self.bulk_set_curtail, curtail_entries)
+            if curtail_failed is not None:
+                # Retry curtail first so tokens refreshed there are used for the profile requests
+                refreshed = await self._fan_out(self.set_curtail, curtail_failed)
+                tokens = dict(logged_in)
+                for (miner_ip, _, _), token in zip(curtail_failed, refreshed):
+                    if token:
+                        tokens[miner_ip] = token
+
+                profile_entries = [(miner_ip, tokens[miner_ip], profile) for miner_ip, _ in logged_in]
+                profile_failed = await self._bulk(self.bulk_set_profile, profile_entries)
+                if profile_failed is None:
+                    # The API stopped accepting bulk requests between the two calls
+                    profile_failed = profile_entries
+                await self._fan_out(self.set_profile, profile_failed)
+                return
+            miner_ips = [miner_ip for miner_ip, _ in logged_in]
+
+        # No bulk API: process each miner on its own
+        process_miner = functools.partial(self.process_miner, profile=profile, curtail_mode=curtail_mode)
+        await self._fan_out(process_miner, [(miner_ip,) for miner_ip in miner_ips])
+
+    async def _bulk(self, func, entries):
+        """
+        Runs a bulk_set_* method in a worker thread. If it raises, the error is logged and every
+        entry is returned as failed so those miners get the per-miner retry.
+
+        Returns:
+            list: The entries to retry per miner, or None if bulk requests are unsupported.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor, func, entries)
+        except Exception as e:
+            self.logger.error("Error in bulk request, retrying %s miners individually: %s", len(entries), e)
+            return list(entries)
+
+    async def _fan_out(self, func, calls):
+        """
+        Runs func concurrently in worker threads for each argument tuple in calls (the first argument being the miner IP).
+        Calls are observed as they complete, so failures are logged right away instead of after the slowest miner.
+
+        Returns:
+            list: The result of each call, in order, with None for calls that raised (the error is logged).
+        """
+        loop = asyncio.get_running_loop()
+
+        async def call(index, args):
+            try:
+                return index, await loop.run_in_executor(self._executor, func, *args)
+            except Exception as e:
+                self.logger.error("Error processing miner %s: %s", args[0], e)
+                return index, None
+
+        results = [None] * len(calls)
+        for completed, next_done in enumerate(asyncio.as_completed([call(index, args) for index, args in enumerate(calls)]), 1):
+            index, results[index] = await next_done
+            if completed % 100 == 0 and self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("Completed %s of %s miners.", completed, len(calls))
+        return results
+
+    def _new_executor(self):
+        """
+        Creates the worker pool for the blocking API calls.
+        """
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='miner')
+
+    def close(self):
+        """
+        Stops the worker threads and releases the pooled HTTP connections held by the session.
+        The app can be started again afterwards.
+        """
+        try:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+        finally:
+            self.session.close()
 
     def start(self, cycles=None):
         """
         Starts the application, processing all miners in cycles based on the time of day.
         """
+        if self._executor is None:
+            self._executor = self._new_executor()
+        try:
+            self._run(cycles)
+        finally:
+            try:
+                self.logout_all()
+            finally:
+                self.close()
+
+    def _run(self, cycles):
         cycle_count = 0
         while True:
             profile, curtail_mode, next_transition = self.determine_mode()
-            
-            # Process miners concurrently using a thread pool
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                executor.map(self.process_miner, self.miner_ips)
+            next_transition_ts = next_transition.timestamp()
+            self.evict_expired_tokens()
+
+            # Fan out all miners on one event loop; blocking API calls run in worker threads
+            asyncio.run(self.run_cycle(profile, curtail_mode))
+            self.logout_uncacheable()
 
-            sleep_time = (next_transition - datetime.now(timezone.utc)).total_seconds()
+            sleep_time = max(0, next_transition_ts - time.time())
             current_time_str = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')
             
-            self.logger.info(f"Current time: {current_time_str}")
+            self.logger.info("Current time: %s", current_time_str)
             print(f"Current time: {current_time_str}")
             
-            self.logger.info(f"Completed one cycle. Sleeping until next transition in {sleep_time // 60} minutes...")
+            self.logger.info("Completed one cycle. Sleeping until next transition in %s minutes...", sleep_time // 60)
             print(f"Completed one cycle. Sleeping until next transition in {sleep_time // 60} minutes...")
 
             if cycles is not None:
@@ -263,7 +653,6 @@ class MinerControlApp:
             time.sleep(sleep_time)
 
 if __name__ == "__main__":
-    # Example IPs, replace with actual miner IPs
-    miner_ips = ["192.168.0." + str(i) for i in range(1000)]
-    app = MinerControlApp(miner_ips, max_workers=10, max_retries=3)
+    # Example miner network, replace with the actual miner subnet (or pass a list of IPs to MinerControlApp)
+    app = MinerControlApp.from_cidr('192.168.0.0/22', max_workers=256, max_retries=3)
     app.start()
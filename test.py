@@ -1,7 +1,9 @@
+import asyncio
 import unittest
 from unittest.mock import patch, MagicMock
 from datetime import datetime, timedelta, timezone
 from miner_control_app import MinerControlApp
+import orjson
 import requests
 
 class TestMinerControlApp(unittest.TestCase):
@@ -11,7 +13,11 @@ class TestMinerControlApp(unittest.TestCase):
         self.miner_ips = [f'192.168.0.{i}' for i in range(1000)]
         self.app = MinerControlApp(self.miner_ips, max_workers=10, max_retries=3)
 
-    @patch('requests.post')
+    def tearDown(self):
+        """Release the worker threads and HTTP session owned by the app."""
+        self.app.close()
+
+    @patch('requests.Session.post')
     def test_login_successful(self, mock_post):
         """Test a successful login."""
         mock_post.return_value = self._mock_response(200, {'token': 'test_token', 'ttl': (datetime.utcnow() + timedelta(minutes=1)).isoformat()})
@@ -21,7 +27,7 @@ class TestMinerControlApp(unittest.TestCase):
         self.assertIn('192.168.0.1', self.app.miner_tokens)
         self.assertEqual(self.app.miner_tokens['192.168.0.1']['token'], 'test_token')
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_login_failed(self, mock_post):
         """Test a failed login."""
         mock_post.return_value = self._mock_response(401)
@@ -30,7 +36,7 @@ class TestMinerControlApp(unittest.TestCase):
         self.assertIsNone(token)
         self.assertNotIn('192.168.0.1', self.app.miner_tokens)
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_logout_successful(self, mock_post):
         """Test a successful logout."""
         self.app.miner_tokens['192.168.0.1'] = {'token': 'test_token', 'ttl': datetime.utcnow() + timedelta(minutes=1)}
@@ -39,64 +45,66 @@ class TestMinerControlApp(unittest.TestCase):
         self.app.logout('192.168.0.1')
         self.assertNotIn('192.168.0.1', self.app.miner_tokens)
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_set_profile_success(self, mock_post):
         """Test setting a profile successfully."""
         mock_post.return_value = self._mock_response(200)
         self.app.set_profile('192.168.0.1', 'test_token', 'normal')
         
-        mock_post.assert_called_once_with(f'{self.app.base_url}/profileset', json={'token': 'test_token', 'profile': 'normal'}, timeout=5)
+        mock_post.assert_called_once_with(f'{self.app.base_url}/profileset', data=orjson.dumps({'token': 'test_token', 'profile': 'normal'}), timeout=(1.0, 5.0))
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_set_profile_already_set(self, mock_post):
         """Test setting a profile that is already set (should ignore)."""
         mock_post.return_value = self._mock_response(400, {'message': 'Miner is already in normal profile.'})
-        with patch('builtins.print') as mocked_print:
+        with self.assertLogs(self.app.logger, level='INFO') as log:
             self.app.set_profile('192.168.0.1', 'test_token', 'normal')
         
-        mocked_print.assert_any_call('Successfully set profile for miner 192.168.0.1 to normal.')
+        self.assertIn('Successfully set profile for miner 192.168.0.1 to normal.', log.output[-1])
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_set_curtail_success(self, mock_post):
         """Test setting curtail successfully."""
         mock_post.return_value = self._mock_response(200)
         self.app.set_curtail('192.168.0.1', 'test_token', 'active')
         
-        mock_post.assert_called_once_with(f'{self.app.base_url}/curtail', json={'token': 'test_token', 'mode': 'active'}, timeout=5)
+        mock_post.assert_called_once_with(f'{self.app.base_url}/curtail', data=orjson.dumps({'token': 'test_token', 'mode': 'active'}), timeout=(1.0, 5.0))
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_set_curtail_already_set(self, mock_post):
         """Test setting curtail that is already set (should ignore)."""
         mock_post.return_value = self._mock_response(400, {'message': 'Miner is already in active mode.'})
-        with patch('builtins.print') as mocked_print:
+        with self.assertLogs(self.app.logger, level='INFO') as log:
             self.app.set_curtail('192.168.0.1', 'test_token', 'active')
         
-        mocked_print.assert_any_call('Curtail mode for miner 192.168.0.1 set to active.')
+        self.assertIn('Curtail mode for miner 192.168.0.1 set to active.', log.output[-1])
 
     @patch('miner_control_app.datetime')
     def test_determine_mode(self, mock_datetime):
         """Test the determine_mode method for different times of the day."""
         test_cases = [
-            (datetime(2024, 1, 1, 5, 0, 0, tzinfo=timezone.utc), 'overclock', 'active'),
-            (datetime(2024, 1, 1, 7, 0, 0, tzinfo=timezone.utc), 'normal', 'active'),
-            (datetime(2024, 1, 1, 13, 0, 0, tzinfo=timezone.utc), 'underclock', 'active'),
-            (datetime(2024, 1, 1, 20, 0, 0, tzinfo=timezone.utc), 'normal', 'sleep')
+            (datetime(2024, 1, 1, 5, 0, 0, tzinfo=timezone.utc), 'overclock', 'active', datetime(2024, 1, 1, 6, tzinfo=timezone.utc)),
+            (datetime(2024, 1, 1, 6, 0, 0, tzinfo=timezone.utc), 'normal', 'active', datetime(2024, 1, 1, 12, tzinfo=timezone.utc)),
+            (datetime(2024, 1, 1, 7, 0, 0, tzinfo=timezone.utc), 'normal', 'active', datetime(2024, 1, 1, 12, tzinfo=timezone.utc)),
+            (datetime(2024, 1, 1, 13, 0, 0, tzinfo=timezone.utc), 'underclock', 'active', datetime(2024, 1, 1, 18, tzinfo=timezone.utc)),
+            (datetime(2024, 1, 1, 20, 0, 0, tzinfo=timezone.utc), 'normal', 'sleep', datetime(2024, 1, 2, 0, tzinfo=timezone.utc))
         ]
         
-        for current_time, expected_profile, expected_curtail_mode in test_cases:
+        for current_time, expected_profile, expected_curtail_mode, expected_transition in test_cases:
             mock_datetime.now.return_value = current_time
-            profile, curtail_mode, _ = self.app.determine_mode()
+            profile, curtail_mode, next_transition = self.app.determine_mode()
             self.assertEqual(profile, expected_profile)
             self.assertEqual(curtail_mode, expected_curtail_mode)
+            self.assertEqual(next_transition, expected_transition)
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_login_network_failure(self, mock_post):
         """Test login failure due to network issues."""
         mock_post.side_effect = requests.exceptions.RequestException("Network Error")
         token = self.app.login('192.168.0.1')
         self.assertIsNone(token)
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_process_miner_with_exceptions(self, mock_post):
         """Test process_miner with simulated exceptions in curtail, profile, and logout."""
         mock_post.return_value = self._mock_response(200, {'token': 'test_token', 'ttl': (datetime.utcnow() + timedelta(minutes=1)).isoformat()})
@@ -105,23 +113,67 @@ class TestMinerControlApp(unittest.TestCase):
              patch.object(self.app, 'set_profile', side_effect=Exception("Profile Error")), \
              patch.object(self.app, 'logout', side_effect=Exception("Logout Error")):
             
-            self.app.process_miner('192.168.0.1')
-
-    @patch('requests.post')
-    def test_make_request_retry_on_failure(self, mock_post):
-        """Test retries on failure with exponential backoff."""
-        mock_post.side_effect = [requests.exceptions.RequestException("Network Error"), self._mock_response(200)]
-        response = self.app.make_request('/login', {'miner_ip': '192.168.0.1'}, retries=3)
-        self.assertEqual(response.status_code, 200)
-
-    @patch('requests.post')
+            self.app.process_miner('192.168.0.1', 'normal', 'active')
+
+    def test_retry_policy_on_adapter(self):
+        """Test that transient failures are retried by urllib3 with exponential backoff."""
+        retry = self.app.session.get_adapter(self.app.base_url).max_retries
+
+        self.assertEqual(retry.total, self.app.max_retries - 1)
+        self.assertEqual(retry.backoff_factor, 1)
+        self.assertEqual(retry.backoff_max, 4)
+        self.assertEqual(set(retry.status_forcelist), {502, 503, 504})
+        self.assertIn('POST', retry.allowed_methods)
+
+    def test_retry_backoff_capped(self):
+        """Test that urllib3 backoff never exceeds 4 seconds, however many retries are allowed."""
+        app = MinerControlApp([], max_retries=8)
+        self.addCleanup(app.close)
+        retry = app.session.get_adapter(app.base_url).max_retries
+
+        for _ in range(7):
+            retry = retry.increment(method='POST', url='/api/login', error=requests.exceptions.ConnectionError())
+        self.assertEqual(retry.get_backoff_time(), 4)
+
+    @patch('requests.Session.post')
+    def test_make_request_network_failure_not_retried_in_python(self, mock_post):
+        """Test that a network error surfacing from the adapter is final and returns None."""
+        mock_post.side_effect = requests.exceptions.RequestException("Network Error")
+        response = self.app.make_request('/login', {'miner_ip': '192.168.0.1'})
+
+        self.assertIsNone(response)
+        mock_post.assert_called_once()
+
+    @patch('requests.Session.post')
+    def test_make_request_ignored_error_returns_sentinel(self, mock_post):
+        """Test that an ignored error returns the sentinel without retrying or touching the response."""
+        mock_resp = self._mock_response(400, {'message': 'Miner is already in normal profile.'})
+        mock_post.return_value = mock_resp
+        response = self.app.make_request('/profileset', {'token': 'test_token'}, ignore_errors=["Miner is already in"])
+
+        self.assertIs(response, MinerControlApp._IGNORED)
+        self.assertEqual(mock_resp.status_code, 400)
+        mock_resp.close.assert_called_once()
+        mock_post.assert_called_once()
+
+    @patch('requests.Session.post')
+    def test_make_request_non_object_error_body(self, mock_post):
+        """Test that an error body that is JSON but not an object is treated as having no message."""
+        mock_resp = self._mock_response(400)
+        mock_resp.content = b'["x"]'
+        mock_post.return_value = mock_resp
+
+        response = self.app.make_request('/profileset', {'token': 'test_token'}, ignore_errors=["Miner is already in"])
+        self.assertIsNone(response)
+
+    @patch('requests.Session.post')
     def test_make_request_unauthorized(self, mock_post):
         """Test an unauthorized POST request that triggers re-login."""
         mock_post.return_value = self._mock_response(401, {'message': 'Unauthorized'})
-        response = self.app.make_request('/login', {'miner_ip': '192.168.0.1'}, retries=3, re_login_on_unauthorized=True)
+        response = self.app.make_request('/login', {'miner_ip': '192.168.0.1'}, re_login_on_unauthorized=True)
         self.assertEqual(response, 'unauthorized')
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_login_no_ttl(self, mock_post):
         """Test login response without a ttl."""
         mock_post.return_value = self._mock_response(200, {'token': 'test_token'})
@@ -131,14 +183,14 @@ class TestMinerControlApp(unittest.TestCase):
         self.assertEqual(token, 'test_token')
         self.assertIsNone(self.app.miner_tokens['192.168.0.1']['ttl'])
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_logout_nonexistent_miner(self, mock_post):
         """Test logout for a miner not in miner_tokens."""
         mock_post.return_value = self._mock_response(200)
         self.app.logout('192.168.0.1')
         self.assertNotIn('192.168.0.1', self.app.miner_tokens)
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_set_profile_error_handling(self, mock_post):
         """Test set_profile with an error response."""
         mock_post.return_value = self._mock_response(500, {'message': 'Internal Server Error'})
@@ -146,7 +198,7 @@ class TestMinerControlApp(unittest.TestCase):
             self.app.set_profile('192.168.0.1', 'test_token', 'normal')
         self.assertIn('Failed to set profile', log.output[-1])
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_login_response_missing_token(self, mock_post):
         """Test login when the response does not contain a token."""
         mock_post.return_value = self._mock_response(200, {'ttl': (datetime.utcnow() + timedelta(minutes=1)).isoformat()})
@@ -163,12 +215,13 @@ class TestMinerControlApp(unittest.TestCase):
     def test_process_miner_set_profile_exception(self, mock_logout, mock_set_curtail, mock_determine_mode, mock_login, mock_set_profile):
         """Test process_miner when an exception occurs during set_profile."""
         mock_login.return_value = 'test_token'
-        mock_determine_mode.return_value = ('normal', 'active', datetime.utcnow() + timedelta(hours=1))
         mock_set_profile.side_effect = Exception("Profile Error")
         
         with self.assertLogs(self.app.logger, level='ERROR') as log:
-            self.app.process_miner('192.168.0.1')
+            self.app.process_miner('192.168.0.1', 'normal', 'active')
         self.assertIn("Error setting profile for 192.168.0.1: Profile Error", log.output[-1])
+        mock_set_curtail.assert_called_once_with('192.168.0.1', 'test_token', 'active')
+        mock_determine_mode.assert_not_called()
 
     @patch('miner_control_app.MinerControlApp.login')
     @patch('miner_control_app.MinerControlApp.make_request')
@@ -184,8 +237,7 @@ class TestMinerControlApp(unittest.TestCase):
         mock_make_request.assert_called_with(
             f'{self.app.base_url}/profileset',
             {'token': 'new_token', 'profile': 'normal'},
-            3,
-            re_login_on_unauthorized=True,
+            re_login_on_unauthorized=False,
             ignore_errors=["Miner is already in"]
         )
 
@@ -203,15 +255,28 @@ class TestMinerControlApp(unittest.TestCase):
         self.assertEqual(mock_make_request.call_count, 1)
         self.assertIn("Unauthorized token for miner 192.168.0.1, attempting re-login...", log.output[0])
 
+    @patch('miner_control_app.MinerControlApp.login')
+    @patch('miner_control_app.MinerControlApp.make_request')
+    def test_set_profile_unauthorized_twice_gives_up(self, mock_make_request, mock_login):
+        """Test set_profile stops after one re-login instead of recursing on repeated unauthorized responses."""
+        mock_make_request.return_value = 'unauthorized'
+        mock_login.return_value = 'new_token'
+
+        with self.assertLogs(self.app.logger, level='ERROR') as log:
+            self.app.set_profile('192.168.0.1', 'expired_token', 'normal')
+
+        self.assertEqual(mock_make_request.call_count, 2)
+        self.assertIn('Failed to set profile for miner 192.168.0.1', log.output[-1])
+
     @patch('miner_control_app.MinerControlApp.make_request')
     def test_logout_failure(self, mock_make_request):
-        """Test logout failure after maximum retries."""
+        """Test logout failure when the request fails."""
         mock_make_request.return_value = None
         self.app.miner_tokens['192.168.0.1'] = {'token': 'test_token', 'ttl': datetime.utcnow() + timedelta(minutes=1)}
         
         with self.assertLogs(self.app.logger, level='ERROR') as log:
             self.app.logout('192.168.0.1')
-        self.assertIn(f'Failed to log out miner 192.168.0.1 after {self.app.max_retries} attempts.', log.output[-1])
+        self.assertIn('Failed to log out miner 192.168.0.1.', log.output[-1])
 
     @patch('miner_control_app.MinerControlApp.make_request')
     @patch('miner_control_app.MinerControlApp.login')
@@ -226,21 +291,20 @@ class TestMinerControlApp(unittest.TestCase):
         mock_make_request.assert_any_call(
             f'{self.app.base_url}/curtail',
             {'token': 'new_token', 'mode': 'active'},
-            self.app.max_retries,
-            re_login_on_unauthorized=True,
+            re_login_on_unauthorized=False,
             ignore_errors=["Miner is already in"]
         )
 
     @patch('miner_control_app.MinerControlApp.make_request')
-    def test_set_curtail_failure_after_retries(self, mock_make_request):
-        """Test set_curtail failure after max retries."""
+    def test_set_curtail_failure(self, mock_make_request):
+        """Test set_curtail failure when the request fails."""
         mock_make_request.return_value = None
         
         with self.assertLogs(self.app.logger, level='ERROR') as log, patch('builtins.print') as mocked_print:
             self.app.set_curtail('192.168.0.1', 'test_token', 'active')
             
-            mocked_print.assert_called_with('Failed to curtail miner 192.168.0.1 after 3 attempts.')
-            self.assertIn('Failed to curtail miner 192.168.0.1 after 3 attempts.', log.output[-1])
+            mocked_print.assert_not_called()
+            self.assertIn('Failed to curtail miner 192.168.0.1.', log.output[-1])
 
     @patch('miner_control_app.MinerControlApp.login')
     def test_process_miner_no_token_skips_steps(self, mock_login):
@@ -248,7 +312,7 @@ class TestMinerControlApp(unittest.TestCase):
         mock_login.return_value = None
         
         with self.assertLogs(self.app.logger, level='ERROR') as log:
-            self.app.process_miner('192.168.0.1')
+            self.app.process_miner('192.168.0.1', 'normal', 'active')
         
         self.assertIn('No token received for 192.168.0.1, skipping further steps.', log.output[-1])
     
@@ -262,7 +326,7 @@ class TestMinerControlApp(unittest.TestCase):
         # Force a top-level exception by mocking an attribute access that raises an exception
         with patch.object(self.app, 'login', side_effect=Exception("Top Level Exception")):
             with self.assertLogs(self.app.logger, level='ERROR') as log:
-                self.app.process_miner('192.168.0.1')
+                self.app.process_miner('192.168.0.1', 'normal', 'active')
 
                 # Print all log messages for debugging
                 for message in log.output:
@@ -282,23 +346,279 @@ class TestMinerControlApp(unittest.TestCase):
 
         miner_ips = ["192.168.0.1", "192.168.0.2"]
         app = MinerControlApp(miner_ips, max_workers=2, max_retries=3)
+        app.bulk_supported = False
 
         app.start(cycles=1)  # Run only one cycle for testing
 
-        mock_process_miner.assert_any_call('192.168.0.1')
-        mock_process_miner.assert_any_call('192.168.0.2')
+        mock_process_miner.assert_any_call('192.168.0.1', profile='normal', curtail_mode='active')
+        mock_process_miner.assert_any_call('192.168.0.2', profile='normal', curtail_mode='active')
         self.assertEqual(mock_process_miner.call_count, 2)
 
         print("[TEST START METHOD] Passed - Single cycle of the start method executed and verified.")
 
 
 
+    @patch('miner_control_app.MinerControlApp.login')
+    def test_get_token_uses_cached_token(self, mock_login):
+        """Test that an unexpired cached token is reused without logging in again."""
+        self.app.miner_tokens['192.168.0.1'] = {'token': 'cached_token', 'ttl': datetime.now(timezone.utc) + timedelta(minutes=1)}
+        token = self.app.get_token('192.168.0.1')
+
+        self.assertEqual(token, 'cached_token')
+        mock_login.assert_not_called()
+
+    @patch('miner_control_app.MinerControlApp.login')
+    def test_get_token_expired_relogin(self, mock_login):
+        """Test that an expired cached token triggers a fresh login."""
+        mock_login.return_value = 'new_token'
+        self.app.miner_tokens['192.168.0.1'] = {'token': 'old_token', 'ttl': datetime.now(timezone.utc) - timedelta(minutes=1)}
+        token = self.app.get_token('192.168.0.1')
+
+        self.assertEqual(token, 'new_token')
+        mock_login.assert_called_once_with('192.168.0.1')
+
+    def test_parse_ttl_formats(self):
+        """Test parsing TTLs given as ISO 8601 and as HTTP dates."""
+        expected = datetime(2024, 1, 1, 6, 0, 0, tzinfo=timezone.utc)
+        self.assertEqual(MinerControlApp.parse_ttl('2024-01-01T06:00:00'), expected)
+        self.assertEqual(MinerControlApp.parse_ttl('Mon, 01 Jan 2024 06:00:00 GMT'), expected)
+        self.assertIsNone(MinerControlApp.parse_ttl(None))
+        self.assertIsNone(MinerControlApp.parse_ttl('not a date'))
+
+    def test_evict_expired_tokens(self):
+        """Test that only expired tokens are evicted; TTL-less ones stay until they are logged out."""
+        now = datetime.now(timezone.utc)
+        self.app.miner_tokens = {
+            '192.168.0.1': {'token': 'a', 'ttl': now + timedelta(minutes=1)},
+            '192.168.0.2': {'token': 'b', 'ttl': now - timedelta(minutes=1)},
+            '192.168.0.3': {'token': 'c', 'ttl': None},
+        }
+        self.app.evict_expired_tokens()
+        self.assertEqual(list(self.app.miner_tokens), ['192.168.0.1', '192.168.0.3'])
+
+    @patch('miner_control_app.MinerControlApp.logout_miners')
+    def test_logout_uncacheable(self, mock_logout_miners):
+        """Test that only tokens without a TTL are logged out at the end of a cycle."""
+        self.app.miner_tokens = {
+            '192.168.0.1': {'token': 'a', 'ttl': datetime.now(timezone.utc) + timedelta(minutes=1)},
+            '192.168.0.2': {'token': 'b', 'ttl': None},
+        }
+        self.app.logout_uncacheable()
+        mock_logout_miners.assert_called_once_with(['192.168.0.2'])
+
+    @patch('miner_control_app.MinerControlApp.login')
+    @patch('miner_control_app.MinerControlApp.make_request')
+    def test_process_miner_reuses_refreshed_token(self, mock_make_request, mock_login):
+        """Test that a token refreshed while setting curtail mode is used for the profile, with a single re-login."""
+        mock_make_request.side_effect = ['unauthorized', self._mock_response(200), self._mock_response(200)]
+        mock_login.return_value = 'new_token'
+        self.app.miner_tokens['192.168.0.1'] = {'token': 'stale_token', 'ttl': datetime.now(timezone.utc) + timedelta(minutes=1)}
+
+        self.app.process_miner('192.168.0.1', 'normal', 'active')
+
+        mock_login.assert_called_once_with('192.168.0.1')
+        self.assertEqual(mock_make_request.call_args_list[-1].args[1], {'token': 'new_token', 'profile': 'normal'})
+
+    @patch('requests.Session.post')
+    def test_bulk_set_curtail_returns_failed_entries(self, mock_post):
+        """Test that bulk curtail sends chunked requests and returns only the entries that were not applied."""
+        self.app.bulk_chunk_size = 2
+        mock_post.side_effect = [
+            self._mock_response(200, {'results': [{'status': 200}, {'status': 400, 'message': 'Miner is already in active mode.'}]}),
+            self._mock_response(200, {'results': [{'status': 401, 'message': 'Unauthorized. Please login with a valid token.'}]}),
+        ]
+        entries = [('192.168.0.1', 't1', 'active'), ('192.168.0.2', 't2', 'active'), ('192.168.0.3', 't3', 'active')]
+
+        failed = self.app.bulk_set_curtail(entries)
+
+        self.assertEqual(failed, [('192.168.0.3', 't3', 'active')])
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertTrue(self.app.bulk_supported)
+
+    @patch('requests.Session.post')
+    def test_bulk_request_unsupported_is_cached(self, mock_post):
+        """Test that a 404 from a bulk endpoint disables bulk requests without retrying."""
+        mock_post.return_value = self._mock_response(404)
+
+        self.assertIsNone(self.app.bulk_set_profile([('192.168.0.1', 't1', 'normal')]))
+        self.assertIsNone(self.app.bulk_set_profile([('192.168.0.1', 't1', 'normal')]))
+        self.assertFalse(self.app.bulk_supported)
+        mock_post.assert_called_once()
+
+    @patch('miner_control_app.MinerControlApp.set_profile')
+    @patch('miner_control_app.MinerControlApp.set_curtail')
+    @patch('miner_control_app.MinerControlApp.bulk_set_profile')
+    @patch('miner_control_app.MinerControlApp.bulk_set_curtail')
+    @patch('miner_control_app.MinerControlApp.get_token')
+    def test_run_cycle_bulk(self, mock_get_token, mock_bulk_curtail, mock_bulk_profile, mock_set_curtail, mock_set_profile):
+        """Test that a cycle uses the bulk API and retries only the failed miners individually."""
+        self.app.miner_ips = ['192.168.0.1', '192.168.0.2']
+        mock_get_token.side_effect = lambda miner_ip: miner_ip + '_token'
+        mock_bulk_curtail.return_value = [('192.168.0.2', '192.168.0.2_token', 'active')]
+        mock_bulk_profile.return_value = []
+        mock_set_curtail.return_value = 'refreshed_token'
+
+        asyncio.run(self.app.run_cycle('normal', 'active'))
+
+        mock_bulk_curtail.assert_called_once_with([('192.168.0.1', '192.168.0.1_token', 'active'), ('192.168.0.2', '192.168.0.2_token', 'active')])
+        # The per-miner curtail retry runs first, so the profile request carries its refreshed token
+        mock_bulk_profile.assert_called_once_with([('192.168.0.1', '192.168.0.1_token', 'normal'), ('192.168.0.2', 'refreshed_token', 'normal')])
+        mock_set_curtail.assert_called_once_with('192.168.0.2', '192.168.0.2_token', 'active')
+        mock_set_profile.assert_not_called()
+
+    @patch('miner_control_app.MinerControlApp.set_profile')
+    @patch('miner_control_app.MinerControlApp.set_curtail')
+    @patch('miner_control_app.MinerControlApp.bulk_set_profile')
+    @patch('miner_control_app.MinerControlApp.bulk_set_curtail')
+    @patch('miner_control_app.MinerControlApp.get_token')
+    def test_run_cycle_bulk_profile_unsupported(self, mock_get_token, mock_bulk_curtail, mock_bulk_profile, mock_set_curtail, mock_set_profile):
+        """Test that profiles fall back to per-miner requests when only the bulk profile call is unsupported."""
+        self.app.miner_ips = ['192.168.0.1', '192.168.0.2']
+        mock_get_token.side_effect = lambda miner_ip: miner_ip + '_token'
+        mock_bulk_curtail.return_value = []
+        mock_bulk_profile.return_value = None
+
+        asyncio.run(self.app.run_cycle('normal', 'active'))
+
+        mock_set_curtail.assert_not_called()
+        mock_set_profile.assert_any_call('192.168.0.1', '192.168.0.1_token', 'normal')
+        mock_set_profile.assert_any_call('192.168.0.2', '192.168.0.2_token', 'normal')
+        self.assertEqual(mock_set_profile.call_count, 2)
+
+    @patch('miner_control_app.MinerControlApp.set_profile')
+    @patch('miner_control_app.MinerControlApp.set_curtail')
+    @patch('miner_control_app.MinerControlApp.bulk_set_profile')
+    @patch('miner_control_app.MinerControlApp.bulk_set_curtail')
+    @patch('miner_control_app.MinerControlApp.get_token')
+    def test_run_cycle_bulk_call_raises(self, mock_get_token, mock_bulk_curtail, mock_bulk_profile, mock_set_curtail, mock_set_profile):
+        """Test that an exception in a bulk call is logged and its miners are retried individually."""
+        self.app.miner_ips = ['192.168.0.1']
+        mock_get_token.return_value = 'test_token'
+        mock_bulk_curtail.side_effect = Exception("Bulk Error")
+        mock_bulk_profile.return_value = []
+
+        with self.assertLogs(self.app.logger, level='ERROR') as log:
+            asyncio.run(self.app.run_cycle('normal', 'active'))
+
+        self.assertTrue(any('Bulk Error' in message for message in log.output))
+        mock_set_curtail.assert_called_once_with('192.168.0.1', 'test_token', 'active')
+        mock_set_profile.assert_not_called()
+
+    @patch('requests.Session.post')
+    def test_bulk_set_curtail_non_string_message(self, mock_post):
+        """Test that a null or non-string result message fails only that entry."""
+        mock_post.return_value = self._mock_response(200, {'results': [{'status': 200}, {'status': 400, 'message': None}, {'status': 400, 'message': 5}]})
+        entries = [('192.168.0.1', 't1', 'active'), ('192.168.0.2', 't2', 'active'), ('192.168.0.3', 't3', 'active')]
+
+        failed = self.app.bulk_set_curtail(entries)
+
+        self.assertEqual(failed, entries[1:])
+
+    @patch('requests.Session.post')
+    def test_bulk_request_malformed_body(self, mock_post):
+        """Test that a bulk response that is not a JSON object marks its entries as failed."""
+        mock_resp = self._mock_response(200)
+        mock_resp.content = b'["not", "an", "object"]'
+        mock_post.return_value = mock_resp
+
+        failed = self.app.bulk_set_curtail([('192.168.0.1', 't1', 'active')])
+
+        self.assertEqual(failed, [('192.168.0.1', 't1', 'active')])
+
+    def test_from_cidr_generates_hosts_each_cycle(self):
+        """Test that a CIDR-based app yields the network's host addresses lazily and on every call."""
+        app = MinerControlApp.from_cidr('192.168.0.0/30')
+        self.addCleanup(app.close)
+
+        self.assertEqual(list(app.iter_miner_ips()), ['192.168.0.1', '192.168.0.2'])
+        self.assertEqual(list(app.iter_miner_ips()), ['192.168.0.1', '192.168.0.2'])
+
+    def test_one_shot_iterator_rejected(self):
+        """Test that a generator of miner IPs is rejected, since it would be empty after the first cycle."""
+        with self.assertRaises(TypeError):
+            MinerControlApp(f'192.168.0.{i}' for i in range(5))
+
+    @patch('miner_control_app.MinerControlApp._process_chunk')
+    def test_run_cycle_processes_in_chunks(self, mock_process_chunk):
+        """Test that run_cycle consumes the miner IPs cycle_chunk_size at a time."""
+        self.app.miner_ips = [f'192.168.0.{i}' for i in range(5)]
+        self.app.cycle_chunk_size = 2
+
+        asyncio.run(self.app.run_cycle('normal', 'active'))
+
+        self.assertEqual([c.args[0] for c in mock_process_chunk.call_args_list],
+                         [['192.168.0.0', '192.168.0.1'], ['192.168.0.2', '192.168.0.3'], ['192.168.0.4']])
+
+    def test_fan_out_keeps_order_and_logs_failures(self):
+        """Test that _fan_out returns results in call order and logs each failing miner."""
+        def get_token(miner_ip):
+            if miner_ip == '192.168.0.2':
+                raise Exception("Boom")
+            return miner_ip + '_token'
+
+        with self.assertLogs(self.app.logger, level='ERROR') as log:
+            results = asyncio.run(self.app._fan_out(get_token, [('192.168.0.1',), ('192.168.0.2',), ('192.168.0.3',)]))
+
+        self.assertEqual(results, ['192.168.0.1_token', None, '192.168.0.3_token'])
+        self.assertIn('Error processing miner 192.168.0.2: Boom', log.output[0])
+
+    def test_connection_pool_sized_to_workers(self):
+        """Test that the API host pool keeps one keep-alive connection per worker."""
+        app = MinerControlApp([], max_workers=32, base_url='http://10.0.0.5:5000/api')
+        self.addCleanup(app.close)
+        adapter = app.session.get_adapter(app.base_url)
+
+        self.assertEqual(app.base_url, 'http://10.0.0.5:5000/api')
+        self.assertEqual(adapter.poolmanager.connection_pool_kw['maxsize'], 32)
+
+    def test_close_releases_session(self):
+        """Test that close() shuts down the worker pool and closes the shared HTTP session."""
+        with patch.object(self.app.session, 'close') as mock_close, \
+             patch.object(self.app._executor, 'shutdown') as mock_shutdown:
+            self.app.close()
+        mock_close.assert_called_once()
+        mock_shutdown.assert_called_once_with(wait=True)
+
+    @patch('miner_control_app.MinerControlApp.process_miner')
+    def test_executor_reused_across_cycles(self, mock_process_miner):
+        """Test that consecutive cycles run on the same worker pool."""
+        self.app.miner_ips = ['192.168.0.1']
+        self.app.bulk_supported = False
+        executor = self.app._executor
+
+        asyncio.run(self.app.run_cycle('normal', 'active'))
+        asyncio.run(self.app.run_cycle('normal', 'active'))
+
+        self.assertIs(self.app._executor, executor)
+        self.assertEqual(mock_process_miner.call_count, 2)
+
+    @patch('miner_control_app.MinerControlApp.process_miner')
+    def test_start_can_run_again_after_close(self, mock_process_miner):
+        """Test that start() can be called again after a previous start() shut the app down."""
+        self.app.miner_ips = ['192.168.0.1']
+        self.app.bulk_supported = False
+
+        self.app.start(cycles=1)
+        self.app.start(cycles=1)
+
+        self.assertEqual(mock_process_miner.call_count, 2)
+
+    @patch('miner_control_app.MinerControlApp.logout_all', side_effect=Exception("Logout Error"))
+    def test_start_closes_when_logout_all_fails(self, mock_logout_all):
+        """Test that a failing logout_all() on shutdown still closes the app."""
+        self.app.miner_ips = []
+
+        with patch.object(self.app.session, 'close') as mock_close:
+            with self.assertRaises(Exception):
+                self.app.start(cycles=1)
+        mock_close.assert_called_once()
+        self.assertIsNone(self.app._executor)
+
     def _mock_response(self, status_code, json_data=None):
         """Helper method to create a mock response with a given status code and optional JSON data."""
         mock_resp = MagicMock()
         mock_resp.status_code = status_code
-        if json_data:
-            mock_resp.json.return_value = json_data
+        mock_resp.content = orjson.dumps(json_data) if json_data else b''
         return mock_resp
 
 if __name__ == '__main__':